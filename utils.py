@@ -1,19 +1,11 @@
 """autoMOO Utilities"""
 
-import csv
-import ast
 import argparse
+import collections
 import configparser
-import dash
-from dash import html
-from dash import dcc
-from dash import dash_table
-from dash.dependencies import Input, Output, State
-import dash_bootstrap_components as dbc
-import plotly.express as px
-import plotly.graph_objs as go
+import functools
 import numpy as np
-import hiplot as hip
+import pandas as pd
 
 
 def input_parser():
@@ -24,9 +16,12 @@ def input_parser():
     -------
     data_file: str
         Data file pulled from config file
-    cor_colormap : str
-        string that dictates correlation matrix colors
+    cor_colormap : list
+        Plotly diverging colormap named in the config file, which dictates
+        correlation matrix colors
     """
+    import plotly.express as px
+
     # Parse command line arguments
     my_parser = argparse.ArgumentParser()
 
@@ -47,32 +42,38 @@ def input_parser():
     elif config_inputs.config is not None:
         my_config = configparser.ConfigParser()
         my_config.read(config_inputs.config)
-        if my_config['FILES']['input'] is None:
-            raise TypeError(
-                'Missing data file path. Please add this to your config file'
-            )
-        if my_config['FILES']['input'] is None:
+        data_file = my_config.get('FILES', 'input', fallback=None)
+        cor_colormap = my_config.get(
+            'PREFERENCES', 'correlation_colormap', fallback=None
+        )
+        if not data_file:
             raise TypeError(
                 'Missing data file path. Please add this to your config file'
             )
-        elif my_config['PREFERENCES']['correlation_colormap'] is None:
+        elif not cor_colormap:
             raise TypeError(
                 'Missing correlation colormap. Please add this to your config'
                 ' file'
             )
+
+        # Resolve colormap name once so the list can be passed through
+        colormap = getattr(px.colors.diverging, cor_colormap, None)
+        if not isinstance(colormap, list):
+            raise ValueError(
+                'Correlation colormap ' + cor_colormap + ' is not a plotly'
+                ' diverging colormap'
+            )
         else:
-            data_file = my_config['FILES']['input']
-            cor_colormap = my_config['PREFERENCES']['correlation_colormap']
-            return data_file, cor_colormap
+            return data_file, colormap
 
 
 def file_reader(path):
     """
     Read contents of Comma Separated Values (CSV) files
 
-    TODO it is faster to guess the datatypes initially instead of for every
-    row with the underlying assumption is that each column will have a
-    consistent datatype
+    The datatype of each column is inferred once for the whole column, with
+    the underlying assumption that each column will have a consistent
+    datatype
 
     Parameters
     ----------
@@ -81,37 +82,77 @@ def file_reader(path):
 
     Returns
     -------
-    data: list
-        List of dictionaries containing the contents of dataset stored in
-        `path`. This has the form
-        [
-            {col1: val1, col2: val1},
-            {col1: val2, col2: val2}
-            ...
-        ]
+    data: pandas.DataFrame
+        DataFrame containing the contents of dataset stored in `path`, one
+        column per column of the file
     """
-    with open(path, 'r') as read_obj:
-        data = []
-        dict_reader = csv.DictReader(read_obj, skipinitialspace=True)
-        for row in dict_reader:
-            data.append({k: ast.literal_eval(v) for k, v in row.items()})
+    data = pd.read_csv(path, engine='pyarrow')
+
+    # Strip leading spaces and quotes from string columns (e.g. '1' is read
+    # as the string 1)
+    data.columns = data.columns.str.lstrip()
+    str_cols = data.select_dtypes(exclude=[np.number, bool]).columns
+    for col in str_cols:
+        data[col] = data[col].str.lstrip().str.strip("'")
 
     return data
 
 
+def _column_correlations(values: np.ndarray):
+    """
+    Pearson correlations between the rows of `values`
+
+    Parameters
+    ----------
+    values: numpy array
+        Array of shape (columns, rows) holding the column data
+
+    Returns
+    -------
+    correlations: numpy array
+        Array of shape (columns, columns) which holds correlations in single
+        precision
+    """
+    # Center in double precision so large column offsets do not cost any
+    # precision, then correlate in single precision to halve memory traffic
+    means = values.mean(axis=1, keepdims=True)
+    centered = values - means
+    norms = np.sqrt(np.einsum('ij,ij->i', centered, centered))
+
+    # Columns whose deviations are within the float64 rounding error of
+    # computing their mean are constant and have no meaningful correlation,
+    # so they are left uncorrelated with every other column
+    mean_error = (
+        4 * values.shape[1] * np.finfo(np.float64).eps * np.abs(means[:, 0])
+    )
+    varies = np.abs(centered).max(axis=1, initial=0) > mean_error
+    scales = np.divide(1, norms, out=np.zeros_like(norms), where=varies)
+
+    # Scale each column to unit length (constant columns to zero) while
+    # casting, so one matrix product of the columns with themselves gives
+    # their correlations
+    normalized = np.empty(values.shape, dtype=np.float32)
+    np.multiply(centered, scales[:, None], out=normalized, casting='same_kind')
+    correlations = normalized @ normalized.T
+    np.clip(correlations, -1, 1, out=correlations)
+    np.fill_diagonal(correlations, 1)
+
+    return correlations
+
+
 def correlation_matrix(
-        data: list,
-        colormap=px.colors.diverging.RdBu
+        data: pd.DataFrame,
+        colormap='RdBu'
 ):
     """
     This function creates correlation matrices.
 
     Parameters
     ----------
-    data: list
-        List of dictionaries containing the contents of dataset
-    colormap: list
-        List of plotly colormap
+    data: pandas.DataFrame
+        DataFrame containing the contents of dataset
+    colormap: list or str
+        List of plotly colormap, or its name
 
     Returns
     -------
@@ -120,29 +161,30 @@ def correlation_matrix(
     correlation_visual: plotly.graph_objs._figure.Figure
         Plotly figure of column correlations
     """
-    # Initialize vars
-    correlations = []
+    import plotly.graph_objs as go
 
     # Get column information
-    num_cols = len(data[0])
+    col_list = list(data.columns)
 
     # Column correlation information
-    for i in range(num_cols):
-        col_cors = []
-        for j in range(num_cols):
-            x = [row[list(row.keys())[i]] for row in data]
-            y = [row[list(row.keys())[j]] for row in data]
-            cor = np.corrcoef(x, y)[0][1]
-            col_cors.append(cor)
-        correlations.append(col_cors)
+    correlations = _column_correlations(data.to_numpy(dtype=np.float64).T)
+
+    # Correlations as whole percentages, which is plenty of resolution for
+    # the heatmap and sends a single byte per cell to the browser
+    correlation_percents = np.rint(
+        np.nan_to_num(correlations) * 100
+    ).astype(np.int8)
 
     # Creates a heatmap visualization that can be used by researcher
     correlation_visual = go.Figure(
         go.Heatmap(
-            z=correlations,
-            x=list(data[0].keys()),
-            y=list(data[0].keys()),
+            z=correlation_percents,
+            x=col_list,
+            y=col_list,
+            zmin=-100,
+            zmax=100,
             colorscale=colormap,
+            colorbar={'title': {'text': 'Correlation (%)'}},
             showscale=True,
             ygap=1,
             xgap=1
@@ -153,8 +195,8 @@ def correlation_matrix(
 
 
 def group_columns(
-    data: list,
-    cors: list,
+    data: pd.DataFrame,
+    cors: np.ndarray,
     cor_threshold
 ):
     """
@@ -162,64 +204,54 @@ def group_columns(
 
     Parameters
     ----------
-    data: list
-        List of dictionaries containing the contents of dataset
-    cors: list
-        List of lists containing column correlations
+    data: pandas.DataFrame
+        DataFrame containing the contents of dataset
+    cors: numpy array
+        Array containing column correlations
     cor_threshold: float
             Current correlation threshold selected by the user
 
     Returns
     -------
-    data_grouped: dict
-        List of dictionaries containing the grouped dataset based on
-        `cor_threshold`
+    data_grouped: pandas.DataFrame
+        DataFrame containing the grouped dataset based on `cor_threshold`
     group_labels_with_columns: dict
         Updated `group_labels_with_columns` based on `cor_threshold`. Keys are
         each group and contents are a list of columns in that group
     """
     # Initialization
     group_label = 0
-    val = -1
     init_group = 'Group 1'
     group_labels_with_columns = {init_group: []}  # initialize empty dictionary
-    data_grouped = []
-    for _ in data:
-        data_grouped.append({init_group: []})
+    group_names = []
+    group_seeds = []  # position of the column representing each group
 
-    col_list = list(data[0].keys())  # create list of column labels
-    for col in col_list:
-        val = val + 1  # iterable value for correlation check
+    # Pairs of columns higher than threshold, each pair only counted once
+    above_threshold = np.triu(np.asarray(cors) > cor_threshold, k=1)
 
-        # List currently grouped columns
-        group_cols = sorted(
-            {x for v in group_labels_with_columns.values() for x in v}
-        )
-
-        # If group label not included in grouped columns already
-        if col not in group_cols:
+    col_list = list(data.columns)  # create list of column labels
+    grouped = np.zeros(len(col_list), dtype=bool)  # columns already grouped
+    for val, col in enumerate(col_list):
+        # If column not included in grouped columns already
+        if not grouped[val]:
             group_label = group_label + 1
             group_name = 'Group ' + str(group_label)
 
-            # Store previous label in new group
-            group_labels_with_columns[group_name] = [col]
+            # Remaining ungrouped columns higher than threshold
+            members = np.nonzero(above_threshold[val] & ~grouped)[0]
+            grouped[members] = True
 
-            # Add column data to grouped data
-            group_vals = [row[list(row.keys())[val]] for row in data]
-            for i, group_val in enumerate(group_vals):
-                data_grouped[i][group_name] = group_val
+            # Store previous label and its members in new group
+            group_labels_with_columns[group_name] = (
+                [col] + [col_list[i] for i in members]
+            )
 
-            # Remaining column labels
-            for leftover in range(val+1, len(col_list), 1):
-                # Pull correlation value
-                correlation_val = cors[val][leftover]
+            # Previous label represents the group in grouped data
+            group_names.append(group_name)
+            group_seeds.append(val)
 
-                if correlation_val > cor_threshold:  # if higher than threshold
-                    stor = col_list[leftover]  # get name of column
-                    # store name of column in group
-                    group_labels_with_columns[group_name].append(stor)
-                else:
-                    pass
+    # Take column data of every group at once
+    data_grouped = data.iloc[:, group_seeds].set_axis(group_names, axis=1)
 
     return data_grouped, group_labels_with_columns
 
@@ -230,16 +262,18 @@ def create_parallel(data):
 
     Parameters
     ----------
-    data: list
-        List of dictionaries containing the contents of dataset
+    data: pandas.DataFrame
+        DataFrame containing the contents of dataset
 
     Returns
     -------
     srcdoc: str
         String of html file
     """
+    import hiplot as hip
+
     # Create plot
-    exp = hip.Experiment.from_iterable(data)
+    exp = hip.Experiment.from_dataframe(data)
     exp.display_data(hip.Displays.PARALLEL_PLOT).update({'hide': ['uid']})
     exp.display_data(hip.Displays.TABLE).update({'hide': ['uid', 'from_uid']})
 
@@ -257,30 +291,121 @@ def create_dashboard(
 
     Parameters
     ----------
-    data: list
-        List of dictionaries containing the contents of dataset. Has form:
-        [
-            {col1: val1, col2: val1 ...},
-            {col1: val2, col2: val2 ...}
-            ...
-        ]
-    cor_colormap: str
-        Plotly diverging colormap
+    data: pandas.DataFrame
+        DataFrame containing the contents of dataset
+    cor_colormap: list or str
+        Plotly diverging colormap, or its name
 
     Returns
     -------
     app: Dash
         AutoMOO dashboard
     """
+    import dash
+    from dash import html
+    from dash import dcc
+    from dash import dash_table
+    from dash import Patch
+    from dash.dependencies import Input, Output, State
+    import dash_bootstrap_components as dbc
+    import plotly.express as px
+
+    # Resolve colormap name, unless already resolved by input_parser
+    if isinstance(cor_colormap, str):
+        cor_colormap = getattr(px.colors.diverging, cor_colormap)
+
     # Initialize app
     app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 
     # Correlation matrix
     cors, cor_fig = correlation_matrix(
         data=data,
-        colormap=getattr(px.colors.diverging, cor_colormap)
+        colormap=cor_colormap
     )
 
+    @functools.lru_cache(maxsize=32)
+    def group_dashboard(cor_threshold):
+        """
+        Group columns for the group table and parallel plot
+
+        Parameters
+        ----------
+        cor_threshold: float
+            Current correlation threshold selected by the user
+
+        Returns
+        -------
+        group_key: tuple
+            Hashable form of the group labels and columns within each group
+        group_table_data: list
+            Data for the group_table display
+        """
+        _, group_labels_with_columns = group_columns(
+            data=data,
+            cors=cors,
+            cor_threshold=cor_threshold,
+        )
+        group_key = tuple(
+            (key, tuple(value))
+            for key, value in group_labels_with_columns.items()
+        )
+
+        # Update group table
+        group_table_data = []
+        for key, value in group_labels_with_columns.items():
+            group_table_data.append(
+                {'Group': key, 'Columns': ', '.join(value)}
+            )
+
+        return group_key, group_table_data
+
+    # Parallel plots of the most recently used groupings of the columns
+    parallel_cache = collections.OrderedDict()
+    parallel_cache_size = 8
+
+    def grouped_parallel(cor_threshold, group_key):
+        """
+        Render the parallel plot of a grouping, shared by every threshold
+        that results in the same groups
+
+        Parameters
+        ----------
+        cor_threshold: float
+            Current correlation threshold selected by the user
+        group_key: tuple
+            Hashable form of the group labels and columns within each group
+
+        Returns
+        -------
+        srcdoc: str
+            html rendering as string
+        """
+        if group_key in parallel_cache:
+            parallel_cache.move_to_end(group_key)
+        else:
+            data_grouped, _ = group_columns(
+                data=data,
+                cors=cors,
+                cor_threshold=cor_threshold,
+            )
+            parallel_cache[group_key] = create_parallel(data_grouped)
+            if len(parallel_cache) > parallel_cache_size:
+                parallel_cache.popitem(last=False)
+
+        return parallel_cache[group_key]
+
+    @functools.lru_cache(maxsize=None)
+    def ungrouped_parallel():
+        """
+        Render the parallel plot of the full dataset once
+
+        Returns
+        -------
+        srcdoc: str
+            html rendering as string
+        """
+        return create_parallel(data)
+
     app.layout = dbc.Container(
         [
             dbc.Row(dbc.Col(html.H1('AutoMOO'))),
@@ -337,13 +462,6 @@ def create_dashboard(
                         )
                     ),
                 )
-            ),
-            dcc.Store(
-                id='memory',
-                data={
-                    'data': data,
-                    'cors': cors,
-                }
             )
         ]
     )
@@ -354,13 +472,11 @@ def create_dashboard(
         Input('update_button', 'n_clicks'),
         State('cor_threshold', 'value'),
         State('group_table', 'data'),
-        State('memory', 'data'),
     )
     def update_dashboard(
             n_clicks,
             cor_threshold,
             group_table_data,
-            memory_data
     ):
         """
         Update parallel axis plots and group table
@@ -373,38 +489,40 @@ def create_dashboard(
             Current correlation threshold selected by the user
         group_table_data: dict
             Group labels and columns within each group
-        memory_data: dict
-            Data stored in memory
 
         Returns
         -------
         srcdoc: str
             html rendering as string
-        group_table_data: dict
-            Data for the group_table display
+        group_table_data: dict or dash.Patch
+            Data for the group_table display, or the changes to it
         """
-        # Unpack memory data
-        data = memory_data['data']
-        cors = memory_data['cors']
-
         if n_clicks == 0:
-            srcdoc = create_parallel(data)
+            srcdoc = ungrouped_parallel()
         else:
-            data_grouped, group_labels_with_columns = group_columns(
-                data=data,
-                cors=cors,
-                cor_threshold=cor_threshold,
-            )
-
-            # Update parallel plot
-            srcdoc = create_parallel(data_grouped)
-
-            # Update group table
-            group_table_data = []
-            for key, value in group_labels_with_columns.items():
-                group_table_data.append(
-                    {'Group': key, 'Columns': ', '.join(value)}
-                )
+            group_key, new_group_table_data = group_dashboard(cor_threshold)
+
+            # Groups already displayed, so skip sending the plot again
+            if new_group_table_data == group_table_data:
+                return dash.no_update, dash.no_update
+
+            srcdoc = grouped_parallel(cor_threshold, group_key)
+
+            if group_table_data is None:
+                group_table_data = new_group_table_data
+            else:
+                # Only send the rows of the group table that changed
+                patched_table = Patch()
+                for i, row in enumerate(new_group_table_data):
+                    if i >= len(group_table_data):
+                        patched_table.append(row)
+                    elif row != group_table_data[i]:
+                        patched_table[i] = row
+                for i in reversed(
+                    range(len(new_group_table_data), len(group_table_data))
+                ):
+                    del patched_table[i]
+                group_table_data = patched_table
 
         return srcdoc, group_table_data
 
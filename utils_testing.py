@@ -2,12 +2,75 @@
 
 import os
 import unittest
+from unittest import mock
+
+import dash
+import numpy as np
+import pandas as pd
 
 import utils
 
 
 class AnalysisLib(unittest.TestCase):
 
+    def test_input_parser_missing_data_file(self):
+        """
+        Test that a config file without a data file path raises an error
+        """
+        # Setup
+        test_file = open('test.ini', 'w')
+        test_file.write(
+            "[FILES]\n\n[PREFERENCES]\ncorrelation_colormap = RdBu"
+        )
+        test_file.close()
+
+        # Run and test
+        with mock.patch('sys.argv', ['main.py', '-c', 'test.ini']):
+            with self.assertRaises(TypeError):
+                utils.input_parser()
+        os.remove('test.ini')
+
+    def test_input_parser_unknown_colormap(self):
+        """
+        Test that a colormap name that is not a plotly diverging colormap
+        raises an error
+        """
+        # Setup
+        test_file = open('test.ini', 'w')
+        test_file.write(
+            "[FILES]\ninput : test.csv\n\n"
+            "[PREFERENCES]\ncorrelation_colormap = NotAColormap"
+        )
+        test_file.close()
+
+        # Run and test
+        with mock.patch('sys.argv', ['main.py', '-c', 'test.ini']):
+            with self.assertRaises(ValueError):
+                utils.input_parser()
+        os.remove('test.ini')
+
+    def test_input_parser_resolves_colormap(self):
+        """
+        Test that the colormap name is resolved to its list of colors
+        """
+        # Setup
+        test_file = open('test.ini', 'w')
+        test_file.write(
+            "[FILES]\ninput : test.csv\n\n"
+            "[PREFERENCES]\ncorrelation_colormap = RdBu"
+        )
+        test_file.close()
+
+        # Run
+        with mock.patch('sys.argv', ['main.py', '-c', 'test.ini']):
+            data_file, cor_colormap = utils.input_parser()
+        os.remove('test.ini')
+
+        # Test
+        self.assertEqual(data_file, 'test.csv')
+        self.assertIsInstance(cor_colormap, list)
+        self.assertEqual(cor_colormap[0], 'rgb(103,0,31)')
+
     def test_file_reader_import(self):
         """
         Basic test for the file reader
@@ -27,7 +90,7 @@ class AnalysisLib(unittest.TestCase):
             {'A': 2, 'B': 0.2, 'C': '2'},
             {'A': 3, 'B': 0.3, 'C': '3'}
         ]
-        self.assertEqual(expect, result)
+        self.assertEqual(expect, result.to_dict('records'))
 
     def test_create_dashboard_default(self):
         """
@@ -41,10 +104,91 @@ class AnalysisLib(unittest.TestCase):
 
         # Create AutoMOO app (assertion assumed no error raised)
         utils.create_dashboard(
-            data=data,
+            data=pd.DataFrame(data),
             cor_colormap='RdBu'
         )
 
+    def test_correlation_matrix_constant_column(self):
+        """
+        Test that a constant column is uncorrelated with other columns
+        """
+        # Setup
+        data = [
+            {'A': 0, 'B': 1, 'C': 2},
+            {'A': 1, 'B': 1, 'C': 1},
+            {'A': 2, 'B': 1, 'C': 0}
+        ]
+        data = pd.DataFrame(data)
+
+        # Run
+        cors, _ = utils.correlation_matrix(data, None)
+
+        # Test
+        cors_expect = [
+            [1, 0, -1],
+            [0, 1, 0],
+            [-1, 0, 1]
+        ]
+        np.testing.assert_allclose(cors, cors_expect, atol=1e-6)
+
+    def test_correlation_matrix_large_offset(self):
+        """
+        Test that a varying column with a large offset is still correlated
+        """
+        # Setup
+        data = pd.DataFrame(
+            {'t': 1.7e9 + np.arange(100.), 'x': np.arange(100.)}
+        )
+
+        # Run
+        cors, _ = utils.correlation_matrix(data, None)
+        _, group_labels_with_columns = utils.group_columns(
+            data=data,
+            cors=cors,
+            cor_threshold=0.9,
+        )
+
+        # Test
+        np.testing.assert_allclose(cors, [[1, 1], [1, 1]], atol=1e-6)
+        self.assertEqual(group_labels_with_columns, {'Group 1': ['t', 'x']})
+
+    def test_correlation_matrix_epoch_milliseconds(self):
+        """
+        Test that a column with a very large offset relative to its spread
+        is still correlated
+        """
+        # Setup
+        data = pd.DataFrame(
+            {'t': 1.7e12 + np.arange(100.), 'x': np.arange(100.)}
+        )
+
+        # Run
+        cors, _ = utils.correlation_matrix(data, None)
+        _, group_labels_with_columns = utils.group_columns(
+            data=data,
+            cors=cors,
+            cor_threshold=0.9,
+        )
+
+        # Test
+        np.testing.assert_allclose(cors, [[1, 1], [1, 1]], atol=1e-6)
+        self.assertEqual(group_labels_with_columns, {'Group 1': ['t', 'x']})
+
+    def test_correlation_matrix_single_spike(self):
+        """
+        Test that columns varying at a single row are still correlated
+        """
+        # Setup
+        spike = np.zeros(2000)
+        spike[0] = 1e-3
+        data = pd.DataFrame({'A': 1e3 + spike, 'B': spike})
+
+        # Run
+        cors, _ = utils.correlation_matrix(data, None)
+
+        # Test
+        np.testing.assert_allclose(cors, [[1, 1], [1, 1]], atol=1e-4)
+
     def test_column_grouping_all_grouping(self):
         """
         Test where all columns are grouped
@@ -55,6 +199,7 @@ class AnalysisLib(unittest.TestCase):
             {'A': 1, 'B': 1, 'C': 1},
             {'A': 2, 'B': 2, 'C': 2}
         ]
+        data = pd.DataFrame(data)
         cors, _ = utils.correlation_matrix(data, None)
         cor_threshold = 0.5
 
@@ -77,7 +222,7 @@ class AnalysisLib(unittest.TestCase):
             group_labels_with_columns_expect
         )
         self.assertEqual(
-            data_grouped,
+            data_grouped.to_dict('records'),
             data_grouped_expect
         )
 
@@ -91,6 +236,7 @@ class AnalysisLib(unittest.TestCase):
             {'A': 1, 'B': 1, 'C': 1},
             {'A': 2, 'B': 0, 'C': 2}
         ]
+        data = pd.DataFrame(data)
         cors, _ = utils.correlation_matrix(data, None)
         cor_threshold = 0.9
 
@@ -117,7 +263,7 @@ class AnalysisLib(unittest.TestCase):
             group_labels_with_columns_expect
         )
         self.assertEqual(
-            data_grouped,
+            data_grouped.to_dict('records'),
             data_grouped_expect
         )
 
@@ -131,6 +277,7 @@ class AnalysisLib(unittest.TestCase):
             {'A': 1, 'B': 1.0, 'C': 1, 'D': 1.0},
             {'A': 2, 'B': 1.5, 'C': 0, 'D': 0.0}
         ]
+        data = pd.DataFrame(data)
         cors, _ = utils.correlation_matrix(data, None)
         cor_threshold = 0.9
 
@@ -156,10 +303,215 @@ class AnalysisLib(unittest.TestCase):
             group_labels_with_columns_expect
         )
         self.assertEqual(
-            data_grouped,
+            data_grouped.to_dict('records'),
+            data_grouped_expect
+        )
+
+    def test_column_grouping_no_repeated_columns(self):
+        """
+        Test where a column is correlated with more than one group
+        """
+        # Setup
+        data = [
+            {'A': 0, 'B': 0, 'C': 0},
+            {'A': 0, 'B': 1, 'C': 1},
+            {'A': 1, 'B': 0, 'C': 1},
+            {'A': 1, 'B': 1, 'C': 2}
+        ]
+        data = pd.DataFrame(data)
+        cors, _ = utils.correlation_matrix(data, None)
+        cor_threshold = 0.5
+
+        # Run
+        data_grouped, group_labels_with_columns = utils.group_columns(
+            data=data,
+            cors=cors,
+            cor_threshold=cor_threshold,
+        )
+
+        # Test
+        group_labels_with_columns_expect = {
+            'Group 1': ['A', 'C'],
+            'Group 2': ['B']
+        }
+        data_grouped_expect = [
+            {'Group 1': 0, 'Group 2': 0},
+            {'Group 1': 0, 'Group 2': 1},
+            {'Group 1': 1, 'Group 2': 0},
+            {'Group 1': 1, 'Group 2': 1}
+        ]
+        self.assertEqual(
+            group_labels_with_columns,
+            group_labels_with_columns_expect
+        )
+        self.assertEqual(
+            data_grouped.to_dict('records'),
             data_grouped_expect
         )
 
+    def get_update_dashboard(self):
+        """
+        Create an app whose dataset groups differently per threshold and
+        return its update_dashboard callback
+        """
+        data = pd.DataFrame({
+            'A': [0, 1, 2, 3, 4],
+            'B': [0, 1, 2, 3, 5],
+            'C': [0, 2, 1, 3, 4],
+            'D': [1, 2, 0, 4, 3]
+        })
+        app = utils.create_dashboard(data=data, cor_colormap='RdBu')
+        callback = list(app.callback_map.values())[0]['callback']
+
+        return callback.__wrapped__
+
+    def test_update_dashboard_first_grouping(self):
+        """
+        Test that the first grouping sends the full group table
+        """
+        # Setup
+        update_dashboard = self.get_update_dashboard()
+
+        # Run
+        srcdoc, group_table_data = update_dashboard(1, 0.85, None)
+
+        # Test
+        group_table_data_expect = [
+            {'Group': 'Group 1', 'Columns': 'A, B, C'},
+            {'Group': 'Group 2', 'Columns': 'D'}
+        ]
+        self.assertIsInstance(srcdoc, str)
+        self.assertEqual(group_table_data, group_table_data_expect)
+
+    def test_update_dashboard_same_groups(self):
+        """
+        Test that unchanged groups send no update
+        """
+        # Setup
+        update_dashboard = self.get_update_dashboard()
+        _, group_table_data = update_dashboard(1, 0.85, None)
+
+        # Run
+        result = update_dashboard(2, 0.8, group_table_data)
+
+        # Test
+        self.assertEqual(result, (dash.no_update, dash.no_update))
+
+    def test_update_dashboard_grow_groups(self):
+        """
+        Test that more groups patches changed rows and appends new rows
+        """
+        # Setup
+        update_dashboard = self.get_update_dashboard()
+        _, group_table_data = update_dashboard(1, 0.85, None)
+
+        # Run
+        srcdoc, patched_table = update_dashboard(2, 0.95, group_table_data)
+
+        # Test
+        operations_expect = [
+            {'operation': 'Assign', 'location': [0],
+             'params': {'value': {'Group': 'Group 1', 'Columns': 'A, B'}}},
+            {'operation': 'Assign', 'location': [1],
+             'params': {'value': {'Group': 'Group 2', 'Columns': 'C'}}},
+            {'operation': 'Append', 'location': [],
+             'params': {'value': {'Group': 'Group 3', 'Columns': 'D'}}}
+        ]
+        self.assertIsInstance(srcdoc, str)
+        self.assertEqual(
+            patched_table.to_plotly_json()['operations'],
+            operations_expect
+        )
+
+    def test_update_dashboard_shrink_groups(self):
+        """
+        Test that fewer groups patches changed rows and deletes extra rows
+        from the end
+        """
+        # Setup
+        update_dashboard = self.get_update_dashboard()
+        _, group_table_data = update_dashboard(1, 0.99, None)
+
+        # Run
+        srcdoc, patched_table = update_dashboard(2, 0.5, group_table_data)
+
+        # Test
+        operations_expect = [
+            {'operation': 'Assign', 'location': [0],
+             'params': {'value': {'Group': 'Group 1',
+                                  'Columns': 'A, B, C, D'}}},
+            {'operation': 'Delete', 'location': [3], 'params': {}},
+            {'operation': 'Delete', 'location': [2], 'params': {}},
+            {'operation': 'Delete', 'location': [1], 'params': {}}
+        ]
+        self.assertIsInstance(srcdoc, str)
+        self.assertEqual(
+            patched_table.to_plotly_json()['operations'],
+            operations_expect
+        )
+
+    def test_update_dashboard_changed_row(self):
+        """
+        Test that only the changed row of the group table is sent
+        """
+        # Setup
+        update_dashboard = self.get_update_dashboard()
+        group_table_data = [
+            {'Group': 'Group 1', 'Columns': 'A, B, C'},
+            {'Group': 'Group 2', 'Columns': 'C, D'}
+        ]
+
+        # Run
+        _, patched_table = update_dashboard(1, 0.85, group_table_data)
+
+        # Test
+        operations_expect = [
+            {'operation': 'Assign', 'location': [1],
+             'params': {'value': {'Group': 'Group 2', 'Columns': 'D'}}}
+        ]
+        self.assertEqual(
+            patched_table.to_plotly_json()['operations'],
+            operations_expect
+        )
+
+    def test_update_dashboard_repeated_column_label(self):
+        """
+        Test that grouping works when a column label is repeated
+        """
+        # Setup
+        data = pd.DataFrame(
+            [[0, 0, 2], [1, 1, 1], [2, 2, 0]],
+            columns=['A', 'A', 'B']
+        )
+        app = utils.create_dashboard(data=data, cor_colormap='RdBu')
+        callback = list(app.callback_map.values())[0]['callback']
+        update_dashboard = callback.__wrapped__
+
+        # Run
+        srcdoc, group_table_data = update_dashboard(1, 0.9, None)
+
+        # Test
+        group_table_data_expect = [
+            {'Group': 'Group 1', 'Columns': 'A, A'},
+            {'Group': 'Group 2', 'Columns': 'B'}
+        ]
+        self.assertIsInstance(srcdoc, str)
+        self.assertEqual(group_table_data, group_table_data_expect)
+
+    def test_update_dashboard_ungrouped_rendered_once(self):
+        """
+        Test that the full dataset plot is reused across page loads
+        """
+        # Setup
+        update_dashboard = self.get_update_dashboard()
+
+        # Run
+        srcdoc_first, _ = update_dashboard(0, None, None)
+        srcdoc_second, _ = update_dashboard(0, None, None)
+
+        # Test
+        self.assertIs(srcdoc_first, srcdoc_second)
+
 
 if __name__ == '__main__':
     unittest.main()